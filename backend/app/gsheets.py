@@ -1,9 +1,20 @@
 import gspread
-from oauth2client.service_account import ServiceAccountCredentials
+from google.oauth2.service_account import Credentials
+import operator
 import os
+import re
+from typing import Optional
 # `load_dotenv` is called in main.py
 
+# Authorized client, created once per process. gspread's session refreshes the
+# access token itself before it expires, so there's no need to re-authorize per request.
+_client = None
+
 def get_google_sheet_instance():
+    global _client
+    if _client is not None:
+        return _client
+
     scope = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
     
     creds_file_name = os.getenv("GOOGLE_CREDENTIALS_FILE")
@@ -18,22 +29,68 @@ def get_google_sheet_instance():
             f"Ensure GOOGLE_CREDENTIALS_FILE in .env is set correctly and the file exists in the `backend` directory (where uvicorn is run)."
         )
                                 
-    creds = ServiceAccountCredentials.from_json_keyfile_name(creds_file_name, scope)
-    client = gspread.authorize(creds)
-    return client
+    creds = Credentials.from_service_account_file(creds_file_name, scopes=scope)
+    _client = gspread.authorize(creds)
+    return _client
+
+# Plain integers/decimals like the rating "4" or "4.5"
+_NUMERIC_STRING_RE = re.compile(r'-?\d+(\.\d+)?')
+
+def to_cell_data(value):
+    """
+    Numbers (and numeric strings such as ratings) become numberValue, so the sheet can sort and
+    average them like USER_ENTERED did. Everything else stays stringValue, so review text is
+    never interpreted as a formula.
+    """
+    if isinstance(value, str) and _NUMERIC_STRING_RE.fullmatch(value):
+        value = float(value) if "." in value else int(value)
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return {"userEnteredValue": {"numberValue": value}}
+    return {"userEnteredValue": {"stringValue": str(value)}}
 
-def save_to_google_sheet(data: list[dict], sheet_id: str): # Expects list of dicts
+def build_update_cells_requests(sheet: gspread.Worksheet, values: list[list]):
+    """
+    Builds batchUpdate requests that replace the whole worksheet's values with `values`.
+    updateCells clears every cell in its range that `rows` doesn't cover, so leftovers
+    from a previous, longer write are removed in the same call.
+    """
+    requests = []
+    # updateCells can't write past the grid, so grow it first (in the same batch) if needed
+    if len(values) > sheet.row_count:
+        requests.append({"appendDimension": {"sheetId": sheet.id, "dimension": "ROWS", "length": len(values) - sheet.row_count}})
+    if values and len(values[0]) > sheet.col_count:
+        requests.append({"appendDimension": {"sheetId": sheet.id, "dimension": "COLUMNS", "length": len(values[0]) - sheet.col_count}})
+
+    requests.append({
+        "updateCells": {
+            "range": {"sheetId": sheet.id},
+            "fields": "userEnteredValue",
+            "rows": [{"values": [to_cell_data(value) for value in row]} for row in values],
+        }
+    })
+    return requests
+
+def open_worksheet(sheet_id: str, client: Optional[gspread.Client] = None):
+    """
+    Opens the first worksheet of the spreadsheet (fetches its metadata from the Sheets API).
+    """
+    client = client or get_google_sheet_instance()
+    return client.open_by_key(sheet_id).sheet1
+
+def save_to_google_sheet(data: list[dict], sheet_id: str, client: Optional[gspread.Client] = None,
+                         worksheet: Optional[gspread.Worksheet] = None): # Expects list of dicts
     """
     Saves data to the specified Google Sheet.
     Expects data as a list of dictionaries.
+    Uses `client` if given (e.g. the one created at app startup), otherwise the cached instance.
+    Pass `worksheet` if it was already opened with open_worksheet() to skip the metadata round-trips.
     """
     try:
-        client = get_google_sheet_instance()
-        sheet = client.open_by_key(sheet_id).sheet1 
-
-        sheet.clear() # Clear existing content
+        sheet = worksheet or open_worksheet(sheet_id, client)
+        spreadsheet = sheet.spreadsheet
 
         if not data:
+            sheet.clear() # Clear existing content
             # print("No data to save to Google Sheet.") # Logged in main.py
             # Write headers even if data is empty, so the sheet isn't totally blank
             # This requires knowing the expected headers. Let's assume ReviewItem fields.
@@ -52,15 +109,15 @@ def save_to_google_sheet(data: list[dict], sheet_id: str): # Expects list of dic
 
 
         headers = list(data[0].keys()) # Assumes all dicts in 'data' have same keys
-        sheet.append_row(headers)
+        # Every row comes from analyze_reviews in main.py with all ReviewItem fields present, so no .get() defaults needed
+        getter = operator.itemgetter(*headers)
+        if len(headers) == 1: # itemgetter with a single key returns the bare value, not a tuple
+            values = [headers] + [[getter(item_dict)] for item_dict in data]
+        else:
+            values = [headers] + [list(getter(item_dict)) for item_dict in data]
 
-        rows_to_append = []
-        for item_dict in data:
-            row = [item_dict.get(header, "") for header in headers]
-            rows_to_append.append(row)
-        
-        if rows_to_append:
-            sheet.append_rows(rows_to_append, value_input_option='USER_ENTERED')
+        # One spreadsheets.batchUpdate call clears the old content and writes the new rows atomically
+        spreadsheet.batch_update({"requests": build_update_cells_requests(sheet, values)})
         
         # print(f"Data successfully saved to Google Sheet ID: {sheet_id}") # Logged in main.py
         return f"https://docs.google.com/spreadsheets/d/{sheet_id}/edit"
@@ -3,13 +3,16 @@
 from fastapi import FastAPI, HTTPException, Body
 from fastapi.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
+from contextlib import asynccontextmanager
+import asyncio
 import os
 import logging
+from typing import Optional
 
 # Import your modules
-from .scraper import scrape_daraz_reviews
+from .scraper import scrape_pages, close_http_client
 from .sentiment import get_sentiment
-from .gsheets import save_to_google_sheet
+from .gsheets import get_google_sheet_instance, open_worksheet, save_to_google_sheet
 from .models import ReviewItem, ScrapeRequest, ScrapeResponse # Ensure ReviewItem is imported
 
 # --- Logging Setup ---
@@ -32,11 +35,32 @@ logger.debug("GOOGLE_SHEET_ID from env: %s", os.getenv("GOOGLE_SHEET_ID"))
 logger.debug("GOOGLE_CREDENTIALS_FILE from env: %s", os.getenv("GOOGLE_CREDENTIALS_FILE"))
 
 
+# --- Startup / Shutdown ---
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Authorizes the Google Sheets client once at startup, so /scrape doesn't redo the token
+    exchange on every call, and closes the scraper's shared HTTP client at shutdown.
+    """
+    app.state.gspread_client = None
+    try:
+        app.state.gspread_client = get_google_sheet_instance()
+        logger.info("Google Sheets client initialized.")
+    except Exception as e_init:
+        # Don't stop the app from starting; /scrape retries and reports the error to the caller.
+        logger.error(f"Could not initialize Google Sheets client at startup: {e_init}")
+
+    yield
+
+    await close_http_client()
+
+
 # --- FastAPI App Initialization ---
 app = FastAPI(
     title="Product Review Sentiment Scraper API",
     description="Scrapes product reviews, performs sentiment analysis, and saves to Google Sheets.",
-    version="1.0.3" # Incremented version
+    version="1.0.3", # Incremented version
+    lifespan=lifespan,
 )
 
 # --- CORS (Cross-Origin Resource Sharing) ---
@@ -55,6 +79,89 @@ app.add_middleware(
 )
 logger.info(f"CORS middleware configured for origins: {origins}")
 
+# --- Pipeline helpers ---
+
+def get_cached_sentiment(text: str, sentiment_cache: dict):
+    sentiment = sentiment_cache.get(text)
+    if sentiment is None:
+        sentiment = get_sentiment(text)
+        sentiment_cache[text] = sentiment
+    return sentiment
+
+def build_review_row(review_raw: dict, sentiment_cache: dict) -> dict:
+    cleaned_text = review_raw["review_text"] # Text is already cleaned in the scraper
+    sentiment_label, sentiment_score = get_cached_sentiment(cleaned_text, sentiment_cache)
+    return {
+        "product_name": str(review_raw.get("product_name", "N/A")),
+        "review_text": cleaned_text,
+        "rating": str(review_raw.get("rating", "N/A")), 
+        "sentiment_label": sentiment_label,
+        "sentiment_score": round(sentiment_score, 4), # Round score for consistency
+    }
+
+def analyze_reviews(reviews_raw: list[dict], sentiment_cache: Optional[dict] = None) -> list[dict]:
+    """
+    Runs sentiment analysis on scraped reviews and returns rows with the ReviewItem fields.
+    Reviews with empty text are skipped. Results are memoized per review text in
+    `sentiment_cache`, since Daraz often repeats short reviews like "Good product".
+    """
+    if sentiment_cache is None:
+        sentiment_cache = {}
+    # The scraper already drops reviews without text; the filter is just a safety net
+    return [
+        build_review_row(review_raw, sentiment_cache)
+        for review_raw in reviews_raw
+        if review_raw.get("review_text")
+    ]
+
+async def prefetch_worksheet(sheet_id: str):
+    """
+    Opens the worksheet in a worker thread. Returns None on failure; save_to_google_sheet
+    then opens it again itself and reports the error to the caller.
+    """
+    try:
+        return await asyncio.to_thread(open_worksheet, sheet_id, app.state.gspread_client)
+    except Exception as e_open:
+        logger.warning(f"Could not open Google Sheet ahead of time: {e_open}")
+        return None
+
+async def scrape_and_analyze(product_url: str) -> list[dict]:
+    """
+    Scrapes the product's reviews and runs sentiment analysis on them, page by page.
+    Raises HTTPException (404/500) if nothing usable was scraped.
+    """
+    # 1. Scrape reviews and 2. perform sentiment analysis
+    # Rows are kept only as plain dicts (what gspread needs); ReviewItems are built from them for the response at the end.
+    scraped_reviews_count = 0
+    processed_reviews: list[dict] = []
+    sentiment_cache: dict = {} # Shared across pages so duplicate texts are only analyzed once
+    try:
+        logger.info(f"Calling scraper function for URL: {product_url}")
+        # Using max_reviews=5 for faster debugging initially, change back to 50 later
+        async for page_reviews in scrape_pages(product_url, max_reviews=50):
+            scraped_reviews_count += len(page_reviews)
+            # Sentiment runs in a worker thread so the next review pages keep downloading meanwhile
+            processed_reviews.extend(await asyncio.to_thread(analyze_reviews, page_reviews, sentiment_cache))
+        
+        if not scraped_reviews_count: # Scraper returned no reviews at all
+            logger.warning(f"Scraper function returned no reviews for URL: {product_url}.")
+            # This is a specific case where scraping happened but found nothing.
+            raise HTTPException(status_code=404, detail=f"No reviews were found by the scraper for the product at {product_url}. This could be due to incorrect selectors in 'scraper.py', the product having no reviews, or reviews being loaded dynamically in a way the current scraper can't handle.")
+        logger.info(f"Scraper function returned {scraped_reviews_count} raw review items.")
+
+    except HTTPException as e_http: # Re-raise HTTPExceptions (like the 404 above)
+        logger.warning(f"HTTPException during scraping stage: {e_http.detail}")
+        raise e_http
+    except Exception as e_scrape: # Catch any other unexpected error from the scraper function
+        logger.error(f"Unexpected error during scraping process for {product_url}: {e_scrape}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Scraping process encountered an unexpected error: {str(e_scrape)}")
+
+    if not processed_reviews: # This means reviews were scraped, but all items had no text
+         logger.warning("No reviews were processable after sentiment analysis (e.g., all scraped items had empty text fields).")
+         raise HTTPException(status_code=404, detail="Although items might have been scraped, no actual review text was found to process for sentiment analysis.")
+    logger.info(f"Successfully processed {len(processed_reviews)} reviews with sentiment.")
+    return processed_reviews
+
 # --- API Endpoints ---
 
 @app.get("/")
@@ -81,66 +188,36 @@ async def scrape_reviews_endpoint(request: ScrapeRequest = Body(...)):
 
     logger.info(f"Processing scrape request for URL: {product_url}")
 
-    # 1. Scrape reviews
-    scraped_reviews_raw = [] # Initialize to prevent potential UnboundLocalError if try block fails early
-    try:
-        logger.info(f"Calling scraper function for URL: {product_url}")
-        # Using max_reviews=5 for faster debugging initially, change back to 50 later
-        scraped_reviews_raw = scrape_daraz_reviews(product_url, max_reviews=50) 
-        
-        if not scraped_reviews_raw: # Scraper function itself returned an empty list
-            logger.warning(f"Scraper function returned no reviews for URL: {product_url}.")
-            # This is a specific case where scraping happened but found nothing.
-            raise HTTPException(status_code=404, detail=f"No reviews were found by the scraper for the product at {product_url}. This could be due to incorrect selectors in 'scraper.py', the product having no reviews, or reviews being loaded dynamically in a way the current scraper can't handle.")
-        logger.info(f"Scraper function returned {len(scraped_reviews_raw)} raw review items.")
-
-    except HTTPException as e_http: # Re-raise HTTPExceptions (like the 404 above)
-        logger.warning(f"HTTPException during scraping stage: {e_http.detail}")
-        raise e_http
-    except Exception as e_scrape: # Catch any other unexpected error from the scraper function
-        logger.error(f"Unexpected error during scraping process for {product_url}: {e_scrape}", exc_info=True)
-        raise HTTPException(status_code=500, detail=f"Scraping process encountered an unexpected error: {str(e_scrape)}")
-
-    # 2. Clean text (already done in scraper ideally) and perform sentiment analysis
-    processed_reviews_for_response: list[ReviewItem] = []
-    processed_reviews_for_sheets: list[dict] = [] # For gsheets which expects list of dicts
-
-    logger.info("Performing sentiment analysis for scraped reviews...")
-    for review_raw in scraped_reviews_raw: # This loop won't run if scraped_reviews_raw is empty
-        cleaned_text = review_raw.get("review_text", "") 
-        
-        if not cleaned_text: # Skip if for some reason review text is empty after scraping
-            logger.debug(f"Skipping a review for product '{review_raw.get('product_name')}' due to empty review text after scraping.")
-            continue
-
-        sentiment_label, sentiment_score = get_sentiment(cleaned_text)
-        
-        review_item_data = ReviewItem(
-            product_name=str(review_raw.get("product_name", "N/A")),
-            review_text=cleaned_text,
-            rating=str(review_raw.get("rating", "N/A")), 
-            sentiment_label=sentiment_label,
-            sentiment_score=round(sentiment_score, 4), # Round score for consistency
-        )
-        processed_reviews_for_response.append(review_item_data)
-        processed_reviews_for_sheets.append(review_item_data.model_dump()) # Convert Pydantic model to dict for gspread
+    # Opening the worksheet costs Sheets API round-trips that don't depend on the reviews,
+    # so start it now in a worker thread and let it overlap with scraping.
+    google_sheet_id = os.getenv("GOOGLE_SHEET_ID")
+    worksheet_task = None
+    if google_sheet_id:
+        worksheet_task = asyncio.create_task(prefetch_worksheet(google_sheet_id))
 
-    if not processed_reviews_for_response: # This means scraped_reviews_raw was not empty, but all items had no text
-         logger.warning("No reviews were processable after sentiment analysis (e.g., all scraped items had empty text fields).")
-         raise HTTPException(status_code=404, detail="Although items might have been scraped, no actual review text was found to process for sentiment analysis.")
-    logger.info(f"Successfully processed {len(processed_reviews_for_response)} reviews with sentiment.")
+    try:
+        processed_reviews = await scrape_and_analyze(product_url)
+    except BaseException:
+        # Don't leave the Sheets prefetch running for a request that has already failed
+        if worksheet_task:
+            worksheet_task.cancel()
+        raise
 
 
     # 3. Save to Google Sheets
-    google_sheet_id = os.getenv("GOOGLE_SHEET_ID")
     if not google_sheet_id:
         logger.error("CRITICAL: GOOGLE_SHEET_ID not configured in environment variables.")
         raise HTTPException(status_code=500, detail="Server configuration error: Google Sheet ID missing.")
 
     sheet_url = "" # Initialize
     try:
-        logger.info(f"Attempting to save {len(processed_reviews_for_sheets)} reviews to Google Sheet ID: {google_sheet_id}")
-        sheet_url = save_to_google_sheet(processed_reviews_for_sheets, google_sheet_id)
+        logger.info(f"Attempting to save {len(processed_reviews)} reviews to Google Sheet ID: {google_sheet_id}")
+        worksheet = await worksheet_task
+        # gspread is blocking I/O; run it in a worker thread so other requests aren't stalled meanwhile
+        sheet_url = await asyncio.to_thread(
+            save_to_google_sheet, processed_reviews, google_sheet_id,
+            client=app.state.gspread_client, worksheet=worksheet,
+        )
         logger.info(f"Data successfully saved to Google Sheet: {sheet_url}")
     except FileNotFoundError as e_fnf: # Specifically catch if credentials file is missing from gsheets module
         logger.error(f"Google Sheets credentials file error: {e_fnf}", exc_info=True)
@@ -153,9 +230,10 @@ async def scrape_reviews_endpoint(request: ScrapeRequest = Body(...)):
 
     # 4. Return saved data as JSON 
     logger.info("Scraping, analysis, and saving completed successfully. Returning response.")
-    return ScrapeResponse(
+    # Every row comes from analyze_reviews with already-typed values, so skip re-validating it
+    return ScrapeResponse.model_construct(
         message="Scraping, analysis, and saving to Google Sheets completed successfully.",
-        data=processed_reviews_for_response, 
+        data=[ReviewItem.model_construct(**row) for row in processed_reviews], 
         sheet_url=sheet_url
     )
 
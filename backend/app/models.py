@@ -1,7 +1,16 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 from typing import List, Optional
 
 class ReviewItem(BaseModel):
+    # Built once per review and never modified, so skip the optional per-field work
+    model_config = ConfigDict(
+        frozen=True,
+        extra="forbid",
+        validate_assignment=False,
+        str_strip_whitespace=False, # Text is already cleaned in the scraper
+        arbitrary_types_allowed=False,
+    )
+
     product_name: str
     review_text: str
     rating: Optional[str] = "N/A" # Default to "N/A" if not found
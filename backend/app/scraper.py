@@ -1,37 +1,71 @@
 # backend/app/scraper.py
-import requests
-from bs4 import BeautifulSoup
+import asyncio
+import atexit
+from cachetools import TTLCache
+import functools
+import httpx
+from bs4 import BeautifulSoup, SoupStrainer
+import math
+import orjson
 import re
 import time
 import logging
 import os
-
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service as ChromeService
-from webdriver_manager.chrome import ChromeDriverManager
-from selenium.common.exceptions import TimeoutException, WebDriverException
+import threading
+from urllib.parse import quote
 
 logger = logging.getLogger(__name__)
 
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/105.0.0.0 Safari/537.36"
+
 # Selectors for product name from the main product page (still needed)
 DARAZ_PRODUCT_INFO_SELECTORS = {
     "product_name_container": "pdp-mod-product-badge-title",
     # "brand_name_link": "pdp-product-brand__brand-link", # Optional
 }
 
+# JSON endpoint the product page itself calls to hydrate SKU details.
+# Used when the server-rendered HTML doesn't contain the product title (JS-gated page).
+DARAZ_SKU_INFO_API_URL = "https://my.daraz.pk/pdp/detail/getSkuInfo?itemId={item_id}"
+
+DARAZ_REVIEW_API_URL = "https://my.daraz.pk/pdp/review/getReviewList?itemId={item_id}&pageSize={page_size}&filter=0&sort=0&pageNo={page_no}"
+API_PAGE_SIZE = 20 # Number of reviews to fetch per API call
+MAX_CONCURRENT_REQUESTS = 4 # Review pages fetched in parallel
+
+DEFAULT_PRODUCT_NAME = "Unknown Product"
+
+# parse_only filters for parse_product_name. The class value may hold several classes, so match by containment.
+_PRODUCT_NAME_STRAINER = SoupStrainer(class_=lambda c: c and DARAZ_PRODUCT_INFO_SELECTORS["product_name_container"] in c)
+_H1_STRAINER = SoupStrainer('h1')
+
+# Recently scraped products, so re-scraping the same URL within the hour skips Daraz entirely.
+# Per process only; with several workers each one keeps its own cache.
+_PRODUCT_CACHE = TTLCache(maxsize=1024, ttl=3600) # (product_url, max_reviews) -> list of review pages
+_PRODUCT_NAME_CACHE = TTLCache(maxsize=1024, ttl=3600) # product_url -> product name
+
+# Shared HTTP/2 client so all Daraz requests, across /scrape calls, reuse the same multiplexed connection
+_HTTP_CLIENT = None
+
+# Headless Chrome kept alive across requests for the USE_SELENIUM_FALLBACK path (see get_driver)
+_DRIVER = None
+_DRIVER_LOCK = threading.Lock()
+
+# Compiled once here since clean_text runs for every review
+_WS_RE = re.compile(r'\s+')
+_ITEM_ID_RE = re.compile(r'-i(\d+)') # Simpler regex to get numbers after -i
+_ITEM_ID_FALLBACK_RE = re.compile(r'/products/.*?(\d{9,})') # Look for a sequence of 9+ digits
+
 def clean_text(text):
-    if text:
-        text = re.sub(r'\s+', ' ', text)
-        # Keep basic punctuation for review text, but remove for product name if it causes issues
-        # For product name, being more aggressive with cleaning might be okay:
-        # text = text.replace(',', '').replace('\n', ' ').replace('\t', ' ')
-        return text.strip()
-    return ""
+    # Keep basic punctuation for review text, but remove for product name if it causes issues
+    # For product name, being more aggressive with cleaning might be okay:
+    # text = text.replace(',', '').replace('\n', ' ').replace('\t', ' ')
+    return _WS_RE.sub(' ', text).strip() if text else ""
 
+@functools.lru_cache(maxsize=4096) # Pure function of the URL
 def extract_item_id_from_url(product_url):
     # Standard pattern: ...-i<ITEM_ID>-s<SKU_ID>.html
     # Or sometimes: ...-i<ITEM_ID>.html before the -s part or query params
-    match = re.search(r'-i(\d+)', product_url) # Simpler regex to get numbers after -i
+    match = _ITEM_ID_RE.search(product_url)
     if match:
         item_id = match.group(1)
         logger.info(f"Extracted itemId: {item_id} from URL: {product_url}")
@@ -39,7 +73,7 @@ def extract_item_id_from_url(product_url):
     else:
         logger.error(f"Could not extract itemId using '-i(\\d+)' pattern from URL: {product_url}")
         # Fallback: Try to find numbers after /products/ if the above fails and before .html or ?
-        match_fallback = re.search(r'/products/.*?(\d{9,})', product_url) # Look for a sequence of 9+ digits
+        match_fallback = _ITEM_ID_FALLBACK_RE.search(product_url)
         if match_fallback:
             item_id = match_fallback.group(1)
             logger.info(f"Extracted itemId (fallback pattern): {item_id} from URL: {product_url}")
@@ -49,17 +83,107 @@ def extract_item_id_from_url(product_url):
             return None
 
 
-def scrape_daraz_reviews(product_url: str, max_reviews: int = 50):
-    logger.info(f"API-Based Scraper: Initiating for URL: {product_url}")
-    reviews_data = []
-    processed_reviews_count = 0
+def to_header_safe_url(url):
+    """
+    Percent-quotes non-ASCII characters so the URL can go in a header like Referer
+    (httpx only accepts ASCII header values). Existing %-escapes are left alone.
+    """
+    return quote(url, safe=":/?#[]@!$&'()*+,;=%~")
 
-    item_id = extract_item_id_from_url(product_url)
-    if not item_id:
-        logger.error("Failed to get item_id, cannot fetch reviews from API.")
-        return []
 
-    # --- Use Selenium briefly to get Product Name ---
+def parse_product_name(page_source):
+    """
+    Extracts the product name from product page HTML, or None if it isn't present.
+    """
+    # Only build the elements we look for instead of the whole (large) product page tree
+    pn_selector = DARAZ_PRODUCT_INFO_SELECTORS["product_name_container"]
+    soup = BeautifulSoup(page_source, 'lxml', parse_only=_PRODUCT_NAME_STRAINER)
+    product_name_tag = soup.find(class_=pn_selector)
+    if not product_name_tag: # Fallback
+        # A strainer can't say "this class OR <h1>", so the fallback needs a second (still strained) parse
+        soup = BeautifulSoup(page_source, 'lxml', parse_only=_H1_STRAINER)
+        product_name_tag = soup.find('h1')
+    if product_name_tag:
+        return clean_text(product_name_tag.get_text()) or None
+    return None
+
+
+async def fetch_product_name_from_page(client, product_url, headers):
+    try:
+        response = await client.get(product_url, headers=headers)
+        response.raise_for_status()
+    except httpx.HTTPError as e_req:
+        logger.error(f"Product page request failed for {product_url}: {e_req}")
+        return None
+
+    if "captcha" in str(response.url).lower():
+        logger.warning(f"Product page redirected to a captcha page: {response.url}")
+        return None
+    return parse_product_name(response.text)
+
+
+async def fetch_product_name_from_sku_api(client, item_id, headers):
+    sku_info_url = DARAZ_SKU_INFO_API_URL.format(item_id=item_id)
+    try:
+        response = await client.get(sku_info_url, headers=headers)
+        response.raise_for_status()
+    except httpx.HTTPError as e_req:
+        logger.error(f"SKU info API request failed: {e_req}")
+        return None
+    try:
+        sku_json = orjson.loads(response.content)
+    except ValueError: # Handles JSONDecodeError
+        logger.error(f"Error decoding JSON from SKU info API. URL: {sku_info_url}. Response text: {response.text[:300]}")
+        return None
+
+    data = sku_json.get('data') if isinstance(sku_json, dict) else None
+    # skuInfos is usually a list, but some responses key it by SKU index ({"0": {...}})
+    sku_infos = data.get('skuInfos') if isinstance(data, dict) else None
+    if isinstance(sku_infos, dict):
+        sku_infos = list(sku_infos.values())
+    if not isinstance(sku_infos, list) or not sku_infos or not isinstance(sku_infos[0], dict):
+        logger.warning(f"SKU info API response has no usable skuInfos. Response: {str(sku_json)[:200]}")
+        return None
+    title = sku_infos[0].get('title')
+    return (clean_text(title) or None) if isinstance(title, str) else None
+
+
+def get_http_client():
+    """
+    Returns the shared httpx.AsyncClient, creating it on first use.
+    """
+    global _HTTP_CLIENT
+    if _HTTP_CLIENT is None or _HTTP_CLIENT.is_closed:
+        _HTTP_CLIENT = httpx.AsyncClient(
+            http2=True,
+            timeout=15.0,
+            follow_redirects=True,
+            limits=httpx.Limits(max_keepalive_connections=10),
+        )
+    return _HTTP_CLIENT
+
+
+async def close_http_client():
+    global _HTTP_CLIENT
+    if _HTTP_CLIENT is not None:
+        await _HTTP_CLIENT.aclose()
+        _HTTP_CLIENT = None
+
+
+def get_driver():
+    """
+    Returns the shared headless Chrome driver, creating it on first use.
+    Callers must hold _DRIVER_LOCK while using it.
+    """
+    global _DRIVER
+    if _DRIVER is not None:
+        return _DRIVER
+
+    # Selenium is only imported here so it stays an optional dependency
+    from selenium import webdriver
+    from selenium.webdriver.chrome.service import Service as ChromeService
+    from webdriver_manager.chrome import ChromeDriverManager
+
     options = webdriver.ChromeOptions()
     options.add_argument('--headless')
     options.add_argument('--disable-gpu')
@@ -68,137 +192,316 @@ def scrape_daraz_reviews(product_url: str, max_reviews: int = 50):
     options.add_argument('--disable-blink-features=AutomationControlled')
     options.add_experimental_option('excludeSwitches', ['enable-automation'])
     options.add_experimental_option('useAutomationExtension', False)
-    options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/105.0.0.0 Safari/537.36")
+    options.add_argument(f"user-agent={USER_AGENT}")
+
+    logger.info("Selenium (for product info): Initializing WebDriver...")
+    service = ChromeService(ChromeDriverManager().install())
+    _DRIVER = webdriver.Chrome(service=service, options=options)
+    _DRIVER.set_page_load_timeout(30) # 30-second timeout for page load
+    return _DRIVER
+
+
+def quit_driver():
+    global _DRIVER
+    if _DRIVER is not None:
+        try:
+            _DRIVER.quit()
+            logger.info("Selenium (for product info): WebDriver quit.")
+        except Exception as e_quit:
+            logger.warning(f"Selenium (for product info): Error while quitting WebDriver: {e_quit}")
+        _DRIVER = None
+
+
+atexit.register(quit_driver)
+
+
+def fetch_product_name_with_selenium(product_url):
+    from selenium.common.exceptions import TimeoutException, WebDriverException
+
+    product_name = None
+    with _DRIVER_LOCK: # One browser, so product pages are loaded one at a time
+        try:
+            driver = get_driver()
+
+            page_loaded_successfully = False
+            for attempt in range(2): # Try twice to load the page
+                try:
+                    logger.info(f"Selenium (for product info): Navigating to {product_url} (Attempt {attempt + 1})")
+                    driver.get(product_url)
+                    logger.info(f"Selenium (for product info): Page loaded. Title: '{driver.title}'")
+                    if "daraz.pk" in driver.current_url.lower() and "error" not in driver.title.lower() and "captcha" not in driver.title.lower():
+                        page_loaded_successfully = True
+                        break
+                    else:
+                        logger.warning(f"Selenium (for product info): Suspicious page load. URL: {driver.current_url}, Title: '{driver.title}'")
+                except TimeoutException:
+                    logger.error(f"Selenium (for product info): Page load TIMEOUT for {product_url} on attempt {attempt + 1}.")
+                    if attempt < 1: time.sleep(2)
+                except WebDriverException as e_wd_get:
+                    logger.error(f"Selenium (for product info): WebDriverException during get() on attempt {attempt+1}: {e_wd_get}")
+                    if attempt < 1: time.sleep(2)
+
+            if page_loaded_successfully:
+                product_name = parse_product_name(driver.page_source)
+            else:
+                logger.warning("Selenium (for product info): Failed to load product page correctly to get product name.")
+
+            # Reset session state instead of quitting, so the next request reuses the browser
+            driver.delete_all_cookies()
+
+        except WebDriverException as e_wd_main: # Catch errors during WebDriver setup/main ops
+            logger.error(f"Selenium (for product info): Main WebDriverException: {e_wd_main}", exc_info=False)
+            quit_driver() # The browser may be dead; start a fresh one next time
+        except Exception as e_sel:
+            logger.error(f"Selenium (for product info): Generic error getting product details: {e_sel}", exc_info=False)
+    return product_name
+
 
-    product_name = "Unknown Product"
-    driver = None
+async def get_product_name(client, product_url, item_id):
+    """
+    Cached wrapper around resolve_product_name. The default name isn't cached, so a failed lookup is retried next time.
+    """
+    product_name = _PRODUCT_NAME_CACHE.get(product_url)
+    if product_name is not None:
+        logger.info(f"Product Name (cached): '{product_name}'")
+        return product_name
     try:
-        logger.info("Selenium (for product info): Initializing WebDriver...")
-        service = ChromeService(ChromeDriverManager().install())
-        driver = webdriver.Chrome(service=service, options=options)
-        driver.set_page_load_timeout(30) # 30-second timeout for page load
-        
-        page_loaded_successfully = False
-        for attempt in range(2): # Try twice to load the page
-            try:
-                logger.info(f"Selenium (for product info): Navigating to {product_url} (Attempt {attempt + 1})")
-                driver.get(product_url)
-                logger.info(f"Selenium (for product info): Page loaded. Title: '{driver.title}'")
-                if "daraz.pk" in driver.current_url.lower() and "error" not in driver.title.lower() and "captcha" not in driver.title.lower():
-                    page_loaded_successfully = True
-                    break
-                else:
-                    logger.warning(f"Selenium (for product info): Suspicious page load. URL: {driver.current_url}, Title: '{driver.title}'")
-            except TimeoutException:
-                logger.error(f"Selenium (for product info): Page load TIMEOUT for {product_url} on attempt {attempt + 1}.")
-                if attempt < 1: time.sleep(2)
-            except WebDriverException as e_wd_get:
-                logger.error(f"Selenium (for product info): WebDriverException during get() on attempt {attempt+1}: {e_wd_get}")
-                if attempt < 1: time.sleep(2)
-        
-        if page_loaded_successfully:
-            page_source = driver.page_source
-            soup = BeautifulSoup(page_source, 'html.parser')
-            pn_selector = DARAZ_PRODUCT_INFO_SELECTORS["product_name_container"]
-            product_name_tag = soup.find(class_=pn_selector)
-            if not product_name_tag: product_name_tag = soup.find('h1') # Fallback
-            if product_name_tag:
-                product_name = clean_text(product_name_tag.get_text())
-            logger.info(f"Selenium (for product info): Product Name Scraped: '{product_name}'")
+        product_name = await resolve_product_name(client, product_url, item_id)
+    except Exception as e_name: # A failed name lookup should never fail the scrape itself
+        logger.error(f"Unexpected error getting product name: {e_name}", exc_info=True)
+        product_name = DEFAULT_PRODUCT_NAME
+    if product_name != DEFAULT_PRODUCT_NAME:
+        _PRODUCT_NAME_CACHE[product_url] = product_name
+    return product_name
+
+
+async def resolve_product_name(client, product_url, item_id):
+    """
+    Resolves the product name with plain HTTP requests: the product page HTML first,
+    then the SKU info JSON API if the page is JS-gated. Selenium is only used when
+    USE_SELENIUM_FALLBACK is set and both of those fail.
+    """
+    page_headers = {
+        "User-Agent": USER_AGENT,
+        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    }
+    product_name = await fetch_product_name_from_page(client, product_url, page_headers)
+    if product_name:
+        logger.info(f"Product Name Scraped (product page): '{product_name}'")
+        return product_name
+
+    logger.info("Product name not found in product page HTML, trying SKU info API...")
+    api_headers = {
+        "User-Agent": USER_AGENT,
+        "Accept": "application/json, text/plain, */*",
+        "X-Requested-With": "XMLHttpRequest",
+        "Referer": to_header_safe_url(product_url)
+    }
+    product_name = await fetch_product_name_from_sku_api(client, item_id, api_headers)
+    if product_name:
+        logger.info(f"Product Name Scraped (SKU info API): '{product_name}'")
+        return product_name
+
+    if os.getenv("USE_SELENIUM_FALLBACK"):
+        logger.info("Falling back to Selenium for product name (USE_SELENIUM_FALLBACK is set)...")
+        # Selenium blocks for seconds; keep it off the event loop
+        product_name = await asyncio.to_thread(fetch_product_name_with_selenium, product_url)
+        if product_name:
+            logger.info(f"Product Name Scraped (Selenium): '{product_name}'")
+            return product_name
+
+    logger.warning(f"Failed to get product name. Using default: '{DEFAULT_PRODUCT_NAME}'")
+    return DEFAULT_PRODUCT_NAME
+
+
+def parse_review_items(api_reviews_list, product_name):
+    reviews = []
+    for review_item_api in api_reviews_list:
+        if not isinstance(review_item_api, dict):
+            logger.debug(f"Skipped a malformed API review item: {str(review_item_api)[:100]}")
+            continue
+        review_content = review_item_api.get('reviewContent')
+        review_text = clean_text(review_content) if isinstance(review_content, str) else ""
+
+        # --- RATING KEY - VERIFY THIS by printing review_item_api ---
+        # Common keys: 'ratingStar', 'rating', 'star', 'reviewRating', 'score'
+        # The GitHub script implies 'ratingStar' is often used.
+        rating_value = review_item_api.get('ratingStar') # Get the value directly
+        if rating_value is not None:
+            rating = str(rating_value)
         else:
-            logger.warning(f"Selenium (for product info): Failed to load product page correctly to get product name. Using default: '{product_name}'")
+            # If 'ratingStar' is not found or None, try other common keys or default to N/A
+            rating = str(review_item_api.get('rating', 'N/A')) 
+            if rating == 'N/A': # If 'rating' also N/A, log the item for inspection
+                 logger.debug(f"Rating key 'ratingStar' or 'rating' not found or None in API item. Item: {review_item_api}")
+        # --- END RATING KEY ---
 
-    except WebDriverException as e_wd_main: # Catch errors during WebDriver setup/main ops
-        logger.error(f"Selenium (for product info): Main WebDriverException: {e_wd_main}", exc_info=False)
-    except Exception as e_sel:
-        logger.error(f"Selenium (for product info): Generic error getting product details: {e_sel}", exc_info=False)
-    finally:
-        if driver:
-            driver.quit()
-            logger.info("Selenium (for product info): WebDriver quit.")
-    # --- End Selenium part for product name ---
+        if review_text:
+            reviews.append({
+                "product_name": product_name,
+                "review_text": review_text,
+                "rating": rating
+            })
+            logger.debug(f"  Added review via API: Rating: {rating} - Text: {review_text[:50]}...")
+        else:
+            logger.debug("Skipped an API review item due to empty reviewContent.")
+    return reviews
 
-    # --- Fetch reviews using the API ---
-    logger.info(f"Fetching reviews from API for itemId: {item_id}, Product Name: '{product_name}'")
-    page_no = 1
-    api_page_size = 20 # Number of reviews to fetch per API call
 
-    session = requests.Session()
+async def fetch_review_page(client, semaphore, item_id, page_no, headers):
+    """
+    Fetches one page of the review API. Returns the 'model' dict, or None if the
+    request failed or the response doesn't have the expected shape.
+    """
+    review_api_url = DARAZ_REVIEW_API_URL.format(item_id=item_id, page_size=API_PAGE_SIZE, page_no=page_no)
+    logger.info(f"Fetching reviews: {review_api_url}")
+    # Request and decode are separate try blocks so a request error never reaches the
+    # decode handler, which reads `response`
+    try:
+        async with semaphore:
+            response = await client.get(review_api_url, headers=headers)
+        response.raise_for_status()
+    except httpx.HTTPError as e_req:
+        logger.error(f"Error fetching reviews from API: {e_req}", exc_info=True)
+        return None
+    except Exception as e_api_page:
+        logger.error(f"Unexpected error fetching review page {page_no}: {e_api_page}", exc_info=True)
+        return None
+    try:
+        review_json = orjson.loads(response.content)
+    except ValueError: # Handles JSONDecodeError
+        logger.error(f"Error decoding JSON from review API. URL: {review_api_url}. Response text: {response.text[:300]}", exc_info=True)
+        return None
+
+    model = review_json.get('model') if isinstance(review_json, dict) else None
+    if not isinstance(model, dict) or not isinstance(model.get('items'), list):
+        logger.warning(f"Review API response format unexpected or model/items missing for page {page_no}. Response: {str(review_json)[:200]}")
+        return None
+
+    logger.info(f"API returned {len(model['items'])} items for page {page_no}.")
+    return model
+
+
+def get_total_pages(first_page_model):
+    """
+    Works out how many review pages exist from page 1's paginator.
+    """
+    paginator = first_page_model.get('paginator')
+    if not isinstance(paginator, dict):
+        paginator = {}
+    try:
+        total_pages = paginator.get('totalPages')
+        if total_pages:
+            return int(total_pages)
+        total = paginator.get('total')
+        if total:
+            return math.ceil(int(total) / API_PAGE_SIZE)
+    except (TypeError, ValueError):
+        logger.warning(f"Review API paginator has unexpected values: {str(paginator)[:200]}")
+    # No paginator: a short first page means it's the only one, otherwise we don't know
+    if len(first_page_model['items']) < API_PAGE_SIZE:
+        return 1
+    return None
+
+
+async def scrape_pages(product_url: str, max_reviews: int = 50):
+    """
+    Async generator yielding scraped reviews one API page at a time, in page order.
+    Later pages are already being fetched while the caller processes earlier ones.
+    At most `max_reviews` reviews are yielded in total.
+    Complete results are cached in _PRODUCT_CACHE and replayed for repeat requests.
+    """
+    logger.info(f"API-Based Scraper: Initiating for URL: {product_url}")
+
+    cache_key = (product_url, max_reviews)
+    cached_pages = _PRODUCT_CACHE.get(cache_key)
+    if cached_pages is not None:
+        logger.info(f"API-Based Scraper: Returning {sum(len(p) for p in cached_pages)} cached reviews for URL: {product_url}")
+        for page_reviews in cached_pages:
+            yield page_reviews
+        return
+
+    item_id = extract_item_id_from_url(product_url)
+    if not item_id:
+        logger.error("Failed to get item_id, cannot fetch reviews from API.")
+        return
+
     headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/105.0.0.0 Safari/537.36",
+        "User-Agent": USER_AGENT,
         "Accept": "application/json, text/plain, */*",
         "X-Requested-With": "XMLHttpRequest",
-        "Referer": product_url 
+        "Referer": to_header_safe_url(product_url)
     }
+    # Limits how many review pages are in flight at once, to stay polite to Daraz
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
 
-    while processed_reviews_count < max_reviews:
-        review_api_url = f'https://my.daraz.pk/pdp/review/getReviewList?itemId={item_id}&pageSize={api_page_size}&filter=0&sort=0&pageNo={page_no}'
-        logger.info(f"Fetching reviews: {review_api_url}")
-        try:
-            response = session.get(review_api_url, headers=headers, timeout=15)
-            response.raise_for_status()
-            review_json = response.json()
-
-            if not review_json or 'model' not in review_json or 'items' not in review_json['model']:
-                logger.warning(f"Review API response format unexpected or model/items missing. Stopping. Response: {str(review_json)[:200]}")
-                break 
-            
-            api_reviews_list = review_json['model']['items']
-            if not api_reviews_list:
-                logger.info("API returned no more review items. End of reviews.")
+    client = get_http_client()
+    # The product name and the first review page don't depend on each other
+    product_name, first_page = await asyncio.gather(
+        get_product_name(client, product_url, item_id),
+        fetch_review_page(client, semaphore, item_id, 1, headers),
+    )
+
+    # --- Fetch reviews using the API ---
+    logger.info(f"Fetching reviews from API for itemId: {item_id}, Product Name: '{product_name}'")
+    if not first_page or not first_page['items']:
+        logger.info("API returned no review items.")
+        return
+
+    total_pages = get_total_pages(first_page)
+    last_page = math.ceil(max_reviews / API_PAGE_SIZE)
+    if total_pages is not None:
+        last_page = min(last_page, total_pages)
+
+    # Start fetching the remaining pages we need right away; they're consumed in page order below
+    page_tasks = [
+        asyncio.create_task(fetch_review_page(client, semaphore, item_id, page_no, headers))
+        for page_no in range(2, last_page + 1)
+    ]
+    reviews_count = 0
+    scraped_pages = []
+    fetch_failed = False
+    try:
+        page = first_page
+        page_no = 1
+        while True:
+            page_reviews = parse_review_items(page['items'], product_name)[:max_reviews - reviews_count]
+            reviews_count += len(page_reviews)
+            if page_reviews:
+                scraped_pages.append(page_reviews)
+                yield page_reviews
+            if reviews_count >= max_reviews or len(page['items']) < API_PAGE_SIZE:
                 break
-            
-            logger.info(f"API returned {len(api_reviews_list)} items for page {page_no}.")
-
-            for review_item_api in api_reviews_list:
-                if processed_reviews_count >= max_reviews:
-                    break
-                
-                review_text = clean_text(review_item_api.get('reviewContent', ''))
-                
-                # --- RATING KEY - VERIFY THIS by printing review_item_api ---
-                # Common keys: 'ratingStar', 'rating', 'star', 'reviewRating', 'score'
-                # The GitHub script implies 'ratingStar' is often used.
-                rating_value = review_item_api.get('ratingStar') # Get the value directly
-                if rating_value is not None:
-                    rating = str(rating_value)
-                else:
-                    # If 'ratingStar' is not found or None, try other common keys or default to N/A
-                    rating = str(review_item_api.get('rating', 'N/A')) 
-                    if rating == 'N/A': # If 'rating' also N/A, log the item for inspection
-                         logger.debug(f"Rating key 'ratingStar' or 'rating' not found or None in API item. Item: {review_item_api}")
-                # --- END RATING KEY ---
-
-                if review_text:
-                    reviews_data.append({
-                        "product_name": product_name,
-                        "review_text": review_text,
-                        "rating": rating
-                    })
-                    processed_reviews_count += 1
-                    logger.debug(f"  Added review via API ({processed_reviews_count}/{max_reviews}): Rating: {rating} - Text: {review_text[:50]}...")
-                else:
-                    logger.debug("Skipped an API review item due to empty reviewContent.")
-            
+
             page_no += 1
-            if len(api_reviews_list) < api_page_size:
-                logger.info("API returned fewer items than page size, assuming last page.")
+            if page_no <= last_page:
+                page = await page_tasks[page_no - 2]
+            elif total_pages is None or page_no <= total_pages:
+                # Some API items have no review text, so top up one page at a time if we're still short
+                page = await fetch_review_page(client, semaphore, item_id, page_no, headers)
+            else:
                 break
-            if processed_reviews_count < max_reviews: # Only sleep if we need more reviews
-                time.sleep(0.5 + (os.urandom(1)[0] / 255.0) * 0.5) # Small random delay 0.5s-1s
+            if not page: # Request or response error, as opposed to running out of reviews
+                fetch_failed = True
+                break
+            if not page['items']:
+                break
+    finally:
+        for task in page_tasks: # Pages we stopped before needing (or the caller gave up)
+            task.cancel()
 
-        except requests.exceptions.RequestException as e_req:
-            logger.error(f"Error fetching reviews from API: {e_req}", exc_info=True)
-            break 
-        except ValueError as e_json: # Handles JSONDecodeError
-            logger.error(f"Error decoding JSON from review API. URL: {review_api_url}. Response text: {response.text[:300]}", exc_info=True)
-            break
-        except Exception as e_api_loop:
-            logger.error(f"Unexpected error in API review fetching loop: {e_api_loop}", exc_info=True)
-            break
+    # Only cache complete results, so a transient API error (or a failed product name
+    # lookup, which get_product_name wants retried) isn't replayed for an hour
+    if scraped_pages and not fetch_failed and product_name != DEFAULT_PRODUCT_NAME:
+        _PRODUCT_CACHE[cache_key] = scraped_pages
+    logger.info(f"API-Based Scraper: Finished. Total reviews fetched: {reviews_count}")
 
-    logger.info(f"API-Based Scraper: Finished. Total reviews fetched: {len(reviews_data)}")
-    return reviews_data[:max_reviews]
+
+async def scrape_daraz_reviews(product_url: str, max_reviews: int = 50):
+    reviews_data = []
+    async for page_reviews in scrape_pages(product_url, max_reviews=max_reviews):
+        reviews_data.extend(page_reviews)
+    return reviews_data
 
 
 if __name__ == "__main__":
@@ -214,7 +517,12 @@ if __name__ == "__main__":
     
     logger.info(f"--- STARTING API-BASED SCRAPER TEST (DIRECT RUN) ---")
     # Test with a number of reviews that might require pagination from the API
-    scraped_data = scrape_daraz_reviews(test_url, max_reviews=50) 
+    async def run_direct_test():
+        try:
+            return await scrape_daraz_reviews(test_url, max_reviews=50)
+        finally:
+            await close_http_client()
+    scraped_data = asyncio.run(run_direct_test())
     
     logger.info(f"--- API-BASED SCRAPER TEST (DIRECT RUN) FINISHED ---")
     if scraped_data:
@@ -1,11 +1,13 @@
-from textblob import TextBlob
+from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+
+# The analyzer loads its lexicon on construction, so build it once and reuse it for every review
+analyzer = SentimentIntensityAnalyzer()
 
 def get_sentiment(text: str):
     """
     Analyzes text and returns sentiment label and score.
     """
-    blob = TextBlob(text)
-    polarity = blob.sentiment.polarity # Score between -1 (negative) and 1 (positive)
+    polarity = analyzer.polarity_scores(text)["compound"] # Score between -1 (negative) and 1 (positive)
 
     # You can adjust these thresholds
     if polarity > 0.05:  # Consider slightly positive as Positive
@@ -15,4 +17,4 @@ def get_sentiment(text: str):
     else:
         label = "Neutral" # Close to zero
         
-    return label, polarity
\ No newline at end of file
+    return label, polarity